@@ -10,9 +10,10 @@ BOT_TOKEN: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
 
 # ─── Download Settings ─────────────────────────────────────
 MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", str(50 * 1024 * 1024)))  # 50 MB
-CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", str(8192)))  # 8 KB
+CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", str(64 * 1024)))  # 64 KB
 MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "3"))
 DOWNLOAD_TIMEOUT: int = int(os.getenv("DOWNLOAD_TIMEOUT", "300"))  # 5 minutes
+MAX_CONCURRENT_DOWNLOADS: int = int(os.getenv("MAX_CONCURRENT_DOWNLOADS", "5"))
 
 # ─── Progress Settings ─────────────────────────────────────
 PROGRESS_UPDATE_INTERVAL: float = float(os.getenv("PROGRESS_UPDATE_INTERVAL", "3.0"))
@@ -31,6 +32,7 @@ WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
 
 # ─── Telegram Limits ──────────────────────────────────────
 TELEGRAM_FILE_LIMIT: int = 50 * 1024 * 1024  # 50 MB (Bot API limit)
+TELEGRAM_CALLS_PER_SECOND: int = int(os.getenv("TELEGRAM_CALLS_PER_SECOND", "25"))  # global cap is 30/s
 
 # ─── Allowed File Extensions ──────────────────────────────
 ALLOWED_EXTENSIONS: set = {
@@ -1,6 +1,11 @@
+import os
 import sys
+import queue
+import atexit
 import logging
+import logging.handlers
 from pathlib import Path
+from typing import BinaryIO, Union
 
 from telegram import Update, BotCommand
 from telegram.ext import (
@@ -23,29 +28,46 @@ from config import (
 )
 from services.link_router import extract_urls, route_urls, LinkType
 from services.direct_link_service import DirectLinkService
+from utils.downloader import close_session
+from utils.rate_limit import tg_rate
 from utils.file_utils import cleanup_temp_dir, is_video_file
 
 
 # ─── Logging Setup ─────────────────────────────────────────
 def setup_logging() -> None:
-    """Configure structured logging to console and file."""
-    log_format = "%(asctime)s | %(levelname)-8s | %(name)-25s | %(message)s"
+    """
+    Configure structured logging to console and file.
+    Records are queued on the event-loop thread and written by a
+    background QueueListener, so log I/O never blocks the loop.
+    """
+    formatter = logging.Formatter(
+        "%(asctime)s | %(levelname)-8s | %(name)-25s | %(message)s"
+    )
 
-    handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    handlers: list[logging.Handler] = [stream_handler]
 
     try:
         log_dir = Path(LOG_FILE).parent
         if str(log_dir) != ".":
             log_dir.mkdir(parents=True, exist_ok=True)
-        handlers.append(logging.FileHandler(LOG_FILE, encoding="utf-8"))
+        file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
     except Exception:
         pass  # File logging optional; console always works
 
-    logging.basicConfig(
-        level=getattr(logging, LOG_LEVEL.upper(), logging.INFO),
-        format=log_format,
-        handlers=handlers,
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
     )
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, LOG_LEVEL.upper(), logging.INFO))
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
 
 
 setup_logging()
@@ -68,7 +90,8 @@ async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         "⚠️ Max file size: 50 MB per file\n"
         "📦 Multiple files are zipped automatically"
     )
-    await update.message.reply_text(welcome, parse_mode="Markdown")
+    async with tg_rate:
+        await update.message.reply_text(welcome, parse_mode="Markdown")
 
 
 # ─── Text Messages (URLs) ─────────────────────────────────
@@ -78,10 +101,11 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     urls = extract_urls(text)
 
     if not urls:
-        await update.message.reply_text(
-            "❌ No valid URLs found in your message.\n"
-            "Send a direct download link or upload a .txt file."
-        )
+        async with tg_rate:
+            await update.message.reply_text(
+                "❌ No valid URLs found in your message.\n"
+                "Send a direct download link or upload a .txt file."
+            )
         return
 
     await _process_urls(urls, update, context)
@@ -93,12 +117,14 @@ async def document_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     document = update.message.document
 
     if not document.file_name.lower().endswith(".txt"):
-        await update.message.reply_text(
-            "❌ Please upload a `.txt` file containing URLs."
-        )
+        async with tg_rate:
+            await update.message.reply_text(
+                "❌ Please upload a `.txt` file containing URLs."
+            )
         return
 
-    status = await update.message.reply_text("📄 Reading uploaded file…")
+    async with tg_rate:
+        status = await update.message.reply_text("📄 Reading uploaded file…")
 
     try:
         tg_file = await document.get_file()
@@ -108,10 +134,12 @@ async def document_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         urls = extract_urls(content)
 
         if not urls:
-            await status.edit_text("❌ No valid URLs found in the uploaded file.")
+            async with tg_rate:
+                await status.edit_text("❌ No valid URLs found in the uploaded file.")
             return
 
-        await status.edit_text(f"🔗 Found {len(urls)} URL(s). Starting downloads…")
+        async with tg_rate:
+            await status.edit_text(f"🔗 Found {len(urls)} URL(s). Starting downloads…")
         await _process_urls(urls, update, context, existing_status=status)
 
     except Exception as e:
@@ -128,11 +156,15 @@ async def _process_urls(
 ) -> None:
     """Download → (zip) → send pipeline."""
     chat_id = update.effective_chat.id
-    status = existing_status or await update.message.reply_text(
-        f"🔗 Found {len(urls)} URL(s). Starting download…"
-    )
+    status = existing_status
+    if status is None:
+        async with tg_rate:
+            status = await update.message.reply_text(
+                f"🔗 Found {len(urls)} URL(s). Starting download…"
+            )
 
     session_id: str | None = None
+    payload: Union[Path, BinaryIO, None] = None
 
     try:
         # Route URLs by type
@@ -153,10 +185,10 @@ async def _process_urls(
         if result is None:
             return
 
-        file_path, session_id = result
+        payload, filename, session_id = result
 
         # Verify Telegram size limit
-        file_size = file_path.stat().st_size
+        file_size = _payload_size(payload)
         if file_size > TELEGRAM_FILE_LIMIT:
             await _safe_edit(
                 status,
@@ -168,39 +200,61 @@ async def _process_urls(
         # Upload to Telegram
         await _safe_edit(status, "📤 Uploading to Telegram…")
 
-        with open(file_path, "rb") as f:
-            if is_video_file(file_path.name):
-                await context.bot.send_video(
-                    chat_id=chat_id,
-                    video=f,
-                    filename=file_path.name,
-                    supports_streaming=True,
-                    read_timeout=120,
-                    write_timeout=120,
-                )
-            else:
-                await context.bot.send_document(
-                    chat_id=chat_id,
-                    document=f,
-                    filename=file_path.name,
-                    read_timeout=120,
-                    write_timeout=120,
-                )
-
-        await _safe_edit(status, f"✅ Done! Sent `{file_path.name}`", parse_mode="Markdown")
+        await _send_file(context, chat_id, payload, filename)
+
+        await _safe_edit(status, f"✅ Done! Sent `{filename}`", parse_mode="Markdown")
 
     except Exception as e:
         logger.error(f"Error in _process_urls: {e}", exc_info=True)
         await _safe_edit(status, f"❌ An error occurred: {str(e)[:200]}")
     finally:
+        if payload is not None and not isinstance(payload, Path):
+            payload.close()
         if session_id:
             cleanup_temp_dir(session_id)
 
 
 # ─── Helpers ───────────────────────────────────────────────
+def _payload_size(payload: Union[Path, BinaryIO]) -> int:
+    """Size in bytes of a downloaded file or in-memory buffer."""
+    if isinstance(payload, Path):
+        return payload.stat().st_size
+    size = payload.seek(0, os.SEEK_END)
+    payload.seek(0)
+    return size
+
+
+async def _send_file(
+    context: ContextTypes.DEFAULT_TYPE,
+    chat_id: int,
+    payload: Union[Path, BinaryIO],
+    filename: str,
+) -> None:
+    """Upload a file path or an open binary stream as a video or a document."""
+    async with tg_rate:
+        if is_video_file(filename):
+            await context.bot.send_video(
+                chat_id=chat_id,
+                video=payload,
+                filename=filename,
+                supports_streaming=True,
+                read_timeout=120,
+                write_timeout=120,
+            )
+        else:
+            await context.bot.send_document(
+                chat_id=chat_id,
+                document=payload,
+                filename=filename,
+                read_timeout=120,
+                write_timeout=120,
+            )
+
+
 async def _safe_edit(message, text: str, **kwargs) -> None:
     try:
-        await message.edit_text(text, **kwargs)
+        async with tg_rate:
+            await message.edit_text(text, **kwargs)
     except Exception:
         pass
 
@@ -218,6 +272,12 @@ async def post_init(application: Application) -> None:
     logger.info("Bot commands registered.")
 
 
+async def post_shutdown(application: Application) -> None:
+    """Runs once while the application is shutting down."""
+    await close_session()
+    logger.info("HTTP session closed.")
+
+
 # ─── Entry Point ───────────────────────────────────────────
 def main() -> None:
     if not BOT_TOKEN:
@@ -230,6 +290,7 @@ def main() -> None:
         Application.builder()
         .token(BOT_TOKEN)
         .post_init(post_init)
+        .post_shutdown(post_shutdown)
         .build()
     )
 
@@ -1,20 +1,28 @@
 """
 Direct Link Service — orchestrates downloading, optional zipping, and
-returning the final file path for a batch of direct-download URLs.
+returning the final file for a batch of direct-download URLs.
+
+A single URL is streamed into a spooled buffer and handed straight to the
+uploader; multiple URLs are downloaded concurrently into the session temp
+dir and get zipped.
 """
 
 import uuid
+import asyncio
+import contextlib
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import Optional, BinaryIO, Union
 
+import aiohttp
 from telegram import Message
 
-from config import PROGRESS_UPDATE_INTERVAL
-from utils.downloader import download_file
+from config import PROGRESS_UPDATE_INTERVAL, MAX_CONCURRENT_DOWNLOADS
+from utils.downloader import download_file, download_to_buffer, get_session
 from utils.zipper import create_zip
-from utils.progress import ProgressTracker
+from utils.progress import ProgressTracker, ProgressReporter
 from utils.file_utils import get_temp_dir, cleanup_temp_dir
+from utils.rate_limit import tg_rate
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +34,9 @@ class DirectLinkService:
     Usage:
         service = DirectLinkService()
         result  = await service.process(urls, status_message, chat_id)
-        # result is (file_path, session_id) or None
+        # result is (payload, filename, session_id) or None
+        # payload is a Path, or an open buffer the caller must close;
+        # session_id is None when no temp dir was used
     """
 
     async def process(
@@ -34,41 +44,78 @@ class DirectLinkService:
         urls: list[str],
         status_message: Message,
         chat_id: int,
-    ) -> Optional[tuple[Path, str]]:
+    ) -> Optional[tuple[Union[Path, BinaryIO], str, Optional[str]]]:
         """
-        Download every URL, zip if multiple, return (path, session_id).
+        Download every URL, zip if multiple, return (payload, filename, session_id).
         Returns None when nothing was downloaded.
         """
+        # One pooled session for the whole batch — reuses TCP/TLS connections
+        http = await get_session()
+
+        if len(urls) == 1:
+            return await self._process_single(urls[0], status_message, http)
+
         session_id = uuid.uuid4().hex[:8]
         temp_dir = get_temp_dir(session_id)
-        downloaded: list[Path] = []
 
-        try:
-            for idx, url in enumerate(urls, 1):
-                short_name = url.rsplit("/", 1)[-1].split("?")[0][:50] or "file"
+        status: dict[int, str] = {}
+        reporter = ProgressReporter(
+            message=status_message,
+            header=f"📥 Downloading {len(urls)} files…",
+            status=status,
+            update_interval=PROGRESS_UPDATE_INTERVAL,
+        )
+        sem = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
 
-                await self._safe_edit(
-                    status_message,
-                    f"📥 Downloading file {idx}/{len(urls)}: `{short_name}`…",
-                )
+        async def _one(idx: int, url: str) -> Optional[Path]:
+            short_name = url.rsplit("/", 1)[-1].split("?")[0][:50] or "file"
+            status[idx] = f"⏳ `{short_name}` queued"
 
+            async with sem:
                 tracker = ProgressTracker(
                     message=status_message,
                     filename=short_name,
                     update_interval=PROGRESS_UPDATE_INTERVAL,
+                    status=status,
+                    key=idx,
                 )
+                status[idx] = f"📥 `{short_name}` starting…"
 
                 file_path = await download_file(
                     url=url,
                     dest_dir=temp_dir,
                     progress_callback=tracker.update,
+                    session=http,
                 )
 
-                if file_path is not None:
-                    downloaded.append(file_path)
-                    await tracker.complete()
-                else:
-                    await tracker.error("Download failed after retries")
+            if file_path is not None:
+                await tracker.complete()
+            else:
+                await tracker.error("Download failed after retries")
+            return file_path
+
+        try:
+            reporter_task = asyncio.create_task(reporter.run())
+            tasks = [
+                asyncio.create_task(_one(idx, url))
+                for idx, url in enumerate(urls, 1)
+            ]
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException:
+                # Stop sibling downloads before the temp dir is removed
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            finally:
+                reporter_task.cancel()
+                # Let an in-flight edit finish before the final flush
+                with contextlib.suppress(asyncio.CancelledError):
+                    await reporter_task
+
+            downloaded = [path for path in results if path is not None]
+            await reporter.flush()
 
             # ── Nothing downloaded ──────────────────────────
             if not downloaded:
@@ -81,7 +128,7 @@ class DirectLinkService:
             # ── Single file ─────────────────────────────────
             if len(downloaded) == 1:
                 logger.info(f"Single file ready: {downloaded[0].name}")
-                return downloaded[0], session_id
+                return downloaded[0], downloaded[0].name, session_id
 
             # ── Multiple files → ZIP ───────────────────────
             await self._safe_edit(
@@ -89,19 +136,58 @@ class DirectLinkService:
                 f"🗜 Zipping {len(downloaded)} files…",
             )
             zip_path = temp_dir / f"files_{session_id}.zip"
-            create_zip(downloaded, zip_path)
+            await asyncio.to_thread(create_zip, downloaded, zip_path)
             logger.info(f"ZIP ready: {zip_path.name}")
-            return zip_path, session_id
+            return zip_path, zip_path.name, session_id
 
         except Exception as exc:
             logger.error(f"DirectLinkService.process failed: {exc}", exc_info=True)
             cleanup_temp_dir(session_id)
             raise
 
-    # ── internal helper ─────────────────────────────────────
+    # ── internal helpers ────────────────────────────────────
+    async def _process_single(
+        self,
+        url: str,
+        status_message: Message,
+        http: aiohttp.ClientSession,
+    ) -> Optional[tuple[BinaryIO, str, None]]:
+        """Stream one URL into memory — no temp dir, no disk re-read."""
+        short_name = url.rsplit("/", 1)[-1].split("?")[0][:50] or "file"
+
+        await self._safe_edit(
+            status_message,
+            f"📥 Downloading file 1/1: `{short_name}`…",
+        )
+
+        tracker = ProgressTracker(
+            message=status_message,
+            filename=short_name,
+            update_interval=PROGRESS_UPDATE_INTERVAL,
+        )
+
+        result = await download_to_buffer(
+            url=url,
+            progress_callback=tracker.update,
+            session=http,
+        )
+
+        if result is None:
+            await tracker.error("Download failed after retries")
+            await self._safe_edit(
+                status_message, "❌ No files were downloaded successfully."
+            )
+            return None
+
+        await tracker.complete()
+        buffer, filename = result
+        logger.info(f"Single file ready: {filename}")
+        return buffer, filename, None
+
     @staticmethod
     async def _safe_edit(message: Message, text: str) -> None:
         try:
-            await message.edit_text(text, parse_mode="Markdown")
+            async with tg_rate:
+                await message.edit_text(text, parse_mode="Markdown")
         except Exception:
             pass
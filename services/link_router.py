@@ -14,21 +14,20 @@ from enum import Enum
 
 logger = logging.getLogger(__name__)
 
-# Matches any http/https URL in text
-URL_PATTERN = re.compile(
-    r"https?://[^\s<>\"')\]]+",
-    re.IGNORECASE,
-)
-
-DIRECT_FILE_EXTENSIONS = frozenset({
-    ".mp4", ".mkv", ".avi", ".mov", ".webm",
-    ".zip", ".rar", ".7z", ".tar", ".gz",
-    ".pdf", ".doc", ".docx", ".xls", ".xlsx",
-    ".jpg", ".jpeg", ".png", ".gif", ".webp",
-    ".mp3", ".wav", ".flac", ".ogg",
-    ".apk", ".exe", ".dmg",
-    ".csv", ".json", ".xml",
-})
+# Longer matches are discarded rather than truncated; signed CDN links
+# routinely exceed 2 KB, so this sits at the common server-side limit
+MAX_URL_LENGTH = 8192
+
+# Matches any http/https URL in text; the last character may not be
+# trailing punctuation, so sentence endings are never captured.
+# The greedy body only ever backtracks over a trailing punctuation run,
+# which keeps matching linear on hostile input.
+_URL_REGEX = r"https?://[^\s<>\"')\]]*[^\s<>\"')\].,;:!?]"
+URL_PATTERN = re.compile(_URL_REGEX, re.IGNORECASE)
+
+# Case-sensitive twin: its literal "http" prefix lets the regex engine
+# skip ahead with a fast substring search, which IGNORECASE disables
+_URL_PATTERN_LOWER = re.compile(_URL_REGEX)
 
 
 class LinkType(Enum):
@@ -41,32 +40,34 @@ class LinkType(Enum):
 
 def extract_urls(text: str) -> list[str]:
     """Extract all http/https URLs from arbitrary text."""
-    raw = URL_PATTERN.findall(text)
-    cleaned: list[str] = []
-    for url in raw:
-        url = url.rstrip(".,;:!?)")
-        if url and len(url) > 10:
-            cleaned.append(url)
+    # Cheap pre-filter: most chat messages contain no URL at all
+    schemes = text.count("://")
+    if not schemes:
+        return []
+
+    # Fall back to the case-insensitive scan only if some scheme isn't lowercase
+    if text.count("http://") + text.count("https://") == schemes:
+        pattern = _URL_PATTERN_LOWER
+    else:
+        pattern = URL_PATTERN
+
+    cleaned = [
+        url for url in pattern.findall(text) if 10 < len(url) <= MAX_URL_LENGTH
+    ]
     logger.info(f"Extracted {len(cleaned)} URL(s) from input text")
     return cleaned
 
 
 def classify_url(url: str) -> LinkType:
     """Classify a single URL into a LinkType."""
-    path_lower = url.lower().split("?")[0]
-    for ext in DIRECT_FILE_EXTENSIONS:
-        if path_lower.endswith(ext):
-            return LinkType.DIRECT
-
-    # Default: attempt direct download for unknown URLs
+    # Only one service exists so far: attempt a direct download for every URL
     return LinkType.DIRECT
 
 
 def route_urls(urls: list[str]) -> list[tuple[str, LinkType]]:
     """Classify every URL and return (url, type) pairs."""
-    routed = []
-    for url in urls:
-        link_type = classify_url(url)
-        routed.append((url, link_type))
-        logger.debug(f"Classified {url} → {link_type.value}")
+    routed = [(url, classify_url(url)) for url in urls]
+    if logger.isEnabledFor(logging.DEBUG):
+        for url, link_type in routed:
+            logger.debug(f"Classified {url} → {link_type.value}")
     return routed
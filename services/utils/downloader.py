@@ -1,21 +1,33 @@
 """
 Async Streaming Downloader
-- Chunked writes (never holds entire file in RAM)
+- Chunked writes to disk (batched, off the event loop) or to a spooled buffer
 - Configurable retries with exponential back-off
 - Timeout protection
-- Max-size guard (both header check + streaming check)
-- Progress callback support
+- Max-size guard (HEAD pre-flight + GET header check + streaming check)
+- Progress callback support (throttled in the stream loop)
+- One shared, pooled aiohttp session (DNS cache + keep-alive)
+- Parallel HTTP Range download for large files when the server supports it
 """
 
+import os
+import re
+import time
 import asyncio
 import logging
+import tempfile
 from pathlib import Path
-from typing import Optional, Callable, Awaitable
+from typing import Optional, Callable, Awaitable, BinaryIO, Mapping, TypeVar
 from urllib.parse import urlparse, unquote
 
 import aiohttp
 
-from config import CHUNK_SIZE, MAX_FILE_SIZE, MAX_RETRIES, DOWNLOAD_TIMEOUT
+from config import (
+    CHUNK_SIZE,
+    MAX_FILE_SIZE,
+    MAX_RETRIES,
+    DOWNLOAD_TIMEOUT,
+    PROGRESS_UPDATE_INTERVAL,
+)
 from utils.file_utils import sanitize_filename
 
 logger = logging.getLogger(__name__)
@@ -23,6 +35,60 @@ logger = logging.getLogger(__name__)
 # Type alias for the progress callback
 ProgressCallback = Callable[[int, int], Awaitable[None]]
 
+# Type alias for a chunk consumer fed by the streaming loop
+ChunkSink = Callable[[bytes], Awaitable[None]]
+
+# On-disk downloads are batched into ~1 MB blocks, each written off-loop
+WRITE_BUFFER_SIZE = 1 << 20
+
+# The HEAD pre-flight is only a hint, so it gets a short timeout of its own
+HEAD_TIMEOUT = 10
+
+# Multi-connection downloads: files above RANGE_MIN_SIZE are split into
+# RANGE_PARTS byte ranges when the server advertises Accept-Ranges
+RANGE_MIN_SIZE = 4 * 1024 * 1024
+RANGE_PARTS = 4
+RANGE_CONNECTIONS_PER_HOST = 8
+
+# host → (semaphore, ranged downloads using it). An entry is dropped when its
+# last download finishes, so the dict only ever holds hosts in active use.
+_HOST_SEMAPHORES: dict[str, tuple[asyncio.Semaphore, int]] = {}
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+)")
+
+T = TypeVar("T")
+
+# Shared HTTP session — created lazily inside the running event loop
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared ClientSession, creating it on first use."""
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        connector = aiohttp.TCPConnector(
+            limit=20,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        _SESSION = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=DOWNLOAD_TIMEOUT),
+        )
+    return _SESSION
+
+
+async def close_session() -> None:
+    """Close the shared ClientSession (call on bot shutdown)."""
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+class _RangeRefused(Exception):
+    """The server did not honour a byte-range request."""
+
 
 async def download_file(
     url: str,
@@ -31,27 +97,104 @@ async def download_file(
     max_size: int = MAX_FILE_SIZE,
     retries: int = MAX_RETRIES,
     timeout: int = DOWNLOAD_TIMEOUT,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> Optional[Path]:
     """
     Download a file with retries. Returns the local Path on success, None on failure.
+    Uses the shared session unless *session* is given.
     """
+    session = session or await get_session()
     filename = _extract_filename(url)
     dest_path = dest_dir / filename
 
-    # Avoid name collisions inside the same session directory
+    # Avoid name collisions inside the same session directory. The name is
+    # reserved by creating the file here, before any await, so concurrent
+    # downloads of the same basename can never pick the same path.
     counter = 1
     original_stem = dest_path.stem
-    while dest_path.exists():
-        dest_path = dest_dir / f"{original_stem}_{counter}{dest_path.suffix}"
-        counter += 1
+    while True:
+        try:
+            open(dest_path, "xb").close()
+            break
+        except FileExistsError:
+            dest_path = dest_dir / f"{original_stem}_{counter}{dest_path.suffix}"
+            counter += 1
+        except OSError as exc:
+            # e.g. ENAMETOOLONG — fail this URL only, not the whole batch
+            logger.error(f"Cannot create {dest_path.name} for {url}: {exc}")
+            return None
+
+    async def attempt() -> Optional[Path]:
+        size = await _stream_download(
+            session, url, dest_path, progress_callback, max_size, timeout
+        )
+        if size is None:
+            return None
+        logger.info(f"Downloaded {filename} ({size:,} bytes)")
+        return dest_path
+
+    result = await _with_retries(url, attempt, retries)
+    if result is None:
+        # Clean partial file
+        dest_path.unlink(missing_ok=True)
+    return result
+
+
+async def download_to_buffer(
+    url: str,
+    progress_callback: Optional[ProgressCallback] = None,
+    max_size: int = MAX_FILE_SIZE,
+    retries: int = MAX_RETRIES,
+    timeout: int = DOWNLOAD_TIMEOUT,
+    session: Optional[aiohttp.ClientSession] = None,
+) -> Optional[tuple[BinaryIO, str]]:
+    """
+    Download a file into a spooled temporary buffer instead of a named file.
+    Returns (buffer, filename) with the buffer rewound, or None on failure.
+    The caller owns the buffer and must close it.
+    """
+    session = session or await get_session()
+    filename = _extract_filename(url)
+
+    async def attempt() -> Optional[tuple[BinaryIO, str]]:
+        spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+
+        async def write(chunk: bytes) -> None:
+            spool.write(chunk)
 
+        try:
+            head = await _head(session, url)
+            size = await _stream_to_sink(
+                session, url, write, progress_callback, max_size, timeout, head
+            )
+        except BaseException:
+            spool.close()
+            raise
+
+        if size is None:
+            spool.close()
+            return None
+
+        spool.seek(0)
+        logger.info(f"Downloaded {filename} ({size:,} bytes) into memory")
+        return spool, filename
+
+    return await _with_retries(url, attempt, retries)
+
+
+# ─── Internal ──────────────────────────────────────────────
+
+async def _with_retries(
+    url: str,
+    attempt_fn: Callable[[], Awaitable[Optional[T]]],
+    retries: int,
+) -> Optional[T]:
+    """Run *attempt_fn* up to *retries* times with exponential back-off."""
     for attempt in range(1, retries + 1):
         try:
             logger.info(f"[{attempt}/{retries}] Downloading {url}")
-            result = await _stream_download(url, dest_path, progress_callback, max_size, timeout)
-            if result:
-                size = result.stat().st_size
-                logger.info(f"Downloaded {filename} ({size:,} bytes)")
+            result = await attempt_fn()
+            if result is not None:
                 return result
         except asyncio.TimeoutError:
             logger.warning(f"[{attempt}/{retries}] Timeout for {url}")
@@ -67,55 +210,316 @@ async def download_file(
             await asyncio.sleep(delay)
 
     logger.error(f"All {retries} attempts failed for {url}")
-    # Clean partial file
-    dest_path.unlink(missing_ok=True)
     return None
 
 
-# ─── Internal ──────────────────────────────────────────────
-
 async def _stream_download(
+    session: aiohttp.ClientSession,
     url: str,
     dest_path: Path,
     progress_callback: Optional[ProgressCallback],
     max_size: int,
     timeout: int,
-) -> Optional[Path]:
-    """Low-level streamed download."""
+) -> Optional[int]:
+    """
+    Low-level streamed download to *dest_path*. Returns bytes written.
+    Large files on servers that accept byte ranges are fetched over several
+    connections; otherwise chunks are batched in memory and flushed ~1 MB
+    at a time on a worker thread, so slow disks never stall the event loop.
+    """
+    head = await _head(session, url)
+
+    if head is not None and head.get("Accept-Ranges", "").lower() == "bytes":
+        length = _announced_size(head)
+        if RANGE_MIN_SIZE < length <= max_size:
+            try:
+                return await _ranged_download(
+                    session, url, dest_path, length, progress_callback, timeout
+                )
+            except _RangeRefused:
+                logger.info(f"Range request refused, falling back to one stream: {url}")
+
+    buf = bytearray()
+
+    with open(dest_path, "wb") as fp:
+        async def write(chunk: bytes) -> None:
+            nonlocal buf
+            buf += chunk
+            if len(buf) >= WRITE_BUFFER_SIZE:
+                block, buf = buf, bytearray()
+                await asyncio.to_thread(fp.write, block)
+
+        size = await _stream_to_sink(
+            session, url, write, progress_callback, max_size, timeout, head,
+            reserve=lambda length: asyncio.to_thread(_preallocate, fp.fileno(), length),
+        )
+
+        if size is not None:
+            if buf:
+                await asyncio.to_thread(fp.write, buf)
+            # Drop any preallocated tail the server did not actually send
+            fp.truncate(size)
+
+    return size
+
+
+async def _ranged_download(
+    session: aiohttp.ClientSession,
+    url: str,
+    dest_path: Path,
+    length: int,
+    progress_callback: Optional[ProgressCallback],
+    timeout: int,
+) -> int:
+    """
+    Fetch *length* bytes as RANGE_PARTS parallel byte ranges, each written
+    at its own offset of a preallocated file. Raises _RangeRefused if the
+    server answers a range request with anything but 206.
+    """
     client_timeout = aiohttp.ClientTimeout(total=timeout)
+    host = urlparse(url).netloc
+    part_size = -(-length // RANGE_PARTS)  # ceil division
+    downloaded = 0
+    last_cb = 0.0
+    writes: set[asyncio.Task] = set()
 
-    async with aiohttp.ClientSession(timeout=client_timeout) as session:
-        async with session.get(url, allow_redirects=True) as resp:
-            if resp.status != 200:
-                logger.error(f"HTTP {resp.status} for {url}")
-                return None
+    fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
 
-            content_length = int(resp.headers.get("Content-Length", 0))
+    async def pwrite(block: bytearray, offset: int) -> None:
+        # Shielded so a cancelled part never leaves a write running after close()
+        task = asyncio.create_task(asyncio.to_thread(_pwrite_all, fd, block, offset))
+        writes.add(task)
+        await asyncio.shield(task)
 
-            # Pre-flight size check
-            if content_length and content_length > max_size:
-                logger.error(
-                    f"File too large ({content_length:,} B > {max_size:,} B)"
-                )
-                return None
+    async def fetch(start: int, end: int) -> None:
+        nonlocal downloaded, last_cb
+        headers = {"Range": f"bytes={start}-{end}"}
 
-            downloaded = 0
+        async with host_sem:
+            async with session.get(
+                url, headers=headers, allow_redirects=True, timeout=client_timeout
+            ) as resp:
+                # HEAD may have lied about the size: only accept a part whose
+                # Content-Range is exactly the slice of the length we planned
+                if resp.status != 206 or _content_range(resp.headers) != (start, end, length):
+                    raise _RangeRefused(resp.status)
+
+                offset = start
+                buf = bytearray()
 
-            with open(dest_path, "wb") as fp:
                 async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                    if offset + len(buf) + len(chunk) > end + 1:
+                        raise _RangeRefused(resp.status)
+                    buf += chunk
                     downloaded += len(chunk)
 
-                    if downloaded > max_size:
-                        logger.error("Max size exceeded during streaming")
-                        dest_path.unlink(missing_ok=True)
-                        return None
-
-                    fp.write(chunk)
+                    if len(buf) >= WRITE_BUFFER_SIZE:
+                        block, buf = buf, bytearray()
+                        await pwrite(block, offset)
+                        offset += len(block)
 
                     if progress_callback:
-                        await progress_callback(downloaded, content_length)
+                        now = time.monotonic()
+                        if now - last_cb >= PROGRESS_UPDATE_INTERVAL or downloaded == length:
+                            last_cb = now
+                            await progress_callback(downloaded, length)
+
+                if buf:
+                    await pwrite(buf, offset)
+                    offset += len(buf)
+
+                if offset != end + 1:
+                    raise aiohttp.ClientPayloadError(
+                        f"Range {start}-{end} ended early at byte {offset}"
+                    )
+
+    host_sem = _acquire_host_semaphore(host)
+    try:
+        await asyncio.to_thread(_preallocate, fd, length)
+        tasks = [
+            asyncio.create_task(fetch(start, min(start + part_size, length) - 1))
+            for start in range(0, length, part_size)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    finally:
+        if writes:
+            await asyncio.gather(*writes, return_exceptions=True)
+        os.close(fd)
+        _release_host_semaphore(host)
+
+    return length
+
+
+async def _stream_to_sink(
+    session: aiohttp.ClientSession,
+    url: str,
+    write: ChunkSink,
+    progress_callback: Optional[ProgressCallback],
+    max_size: int,
+    timeout: int,
+    head: Optional[Mapping[str, str]] = None,
+    reserve: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> Optional[int]:
+    """
+    Low-level streamed download feeding every chunk to *write*.
+    *head* holds the HEAD pre-flight headers, if the server answered one.
+    *reserve* is awaited with the announced Content-Length before streaming.
+    Returns the number of bytes received, or None if the download was rejected.
+    """
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    # HEAD pre-flight: reject oversized files before any body is transferred
+    if head is not None:
+        announced = _announced_size(head)
+        if announced > max_size:
+            logger.error(
+                f"File too large per HEAD ({announced:,} B > {max_size:,} B)"
+            )
+            return None
+
+    async with session.get(url, allow_redirects=True, timeout=client_timeout) as resp:
+        if resp.status != 200:
+            logger.error(f"HTTP {resp.status} for {url}")
+            return None
+
+        content_length = _announced_size(resp.headers)
+
+        # Size check for servers that don't answer HEAD (or lie on it)
+        if content_length and content_length > max_size:
+            logger.error(
+                f"File too large ({content_length:,} B > {max_size:,} B)"
+            )
+            return None
+
+        if reserve and content_length:
+            await reserve(content_length)
+
+        downloaded = 0
+        chunks = resp.content.iter_chunked(CHUNK_SIZE)
+
+        # Two copies of the loop so the no-callback case never tests for one
+        if progress_callback is None:
+            async for chunk in chunks:
+                downloaded += len(chunk)
+
+                if downloaded > max_size:
+                    logger.error("Max size exceeded during streaming")
+                    return None
+
+                await write(chunk)
+        else:
+            monotonic = time.monotonic
+            last_cb = 0.0
 
-    return dest_path
+            async for chunk in chunks:
+                downloaded += len(chunk)
+
+                if downloaded > max_size:
+                    logger.error("Max size exceeded during streaming")
+                    return None
+
+                await write(chunk)
+
+                # Only schedule the callback when it would actually report something
+                now = monotonic()
+                if now - last_cb >= PROGRESS_UPDATE_INTERVAL or downloaded == content_length:
+                    last_cb = now
+                    await progress_callback(downloaded, content_length)
+
+    return downloaded
+
+
+async def _head(
+    session: aiohttp.ClientSession,
+    url: str,
+) -> Optional[Mapping[str, str]]:
+    """
+    Return the response headers of a HEAD request, or None if it isn't
+    supported. Purely advisory — failures and slow hosts fall through to GET.
+    """
+    client_timeout = aiohttp.ClientTimeout(total=HEAD_TIMEOUT)
+    try:
+        async with session.head(url, allow_redirects=True, timeout=client_timeout) as resp:
+            if resp.status != 200:
+                return None
+            return resp.headers
+    except asyncio.TimeoutError:
+        logger.debug(f"HEAD timed out for {url}")
+        return None
+    except aiohttp.ClientError as exc:
+        logger.debug(f"HEAD failed for {url}: {exc}")
+        return None
+
+
+def _content_range(headers: Mapping[str, str]) -> Optional[tuple[int, int, int]]:
+    """Parse "bytes start-end/total" from Content-Range, None if absent or malformed."""
+    match = _CONTENT_RANGE.fullmatch(headers.get("Content-Range", "").strip())
+    if match is None:
+        return None
+    start, end, total = match.groups()
+    return int(start), int(end), int(total)
+
+
+def _announced_size(headers: Mapping[str, str]) -> int:
+    """
+    Best-effort file size from response headers, 0 when unknown.
+    Malformed values (e.g. "bytes 0-") are ignored; chunked responses carry
+    no Content-Length, so X-File-Size is consulted where servers provide it.
+    """
+    for name in ("Content-Length", "X-File-Size"):
+        try:
+            size = int(headers.get(name) or "0")
+        except ValueError:
+            continue
+        if size > 0:
+            return size
+    return 0
+
+
+def _acquire_host_semaphore(host: str) -> asyncio.Semaphore:
+    """Per-host cap on parallel range connections; pair with _release_host_semaphore."""
+    sem, users = _HOST_SEMAPHORES.get(host, (None, 0))
+    if sem is None:
+        sem = asyncio.Semaphore(RANGE_CONNECTIONS_PER_HOST)
+    _HOST_SEMAPHORES[host] = (sem, users + 1)
+    return sem
+
+
+def _release_host_semaphore(host: str) -> None:
+    sem, users = _HOST_SEMAPHORES[host]
+    if users <= 1:
+        del _HOST_SEMAPHORES[host]
+    else:
+        _HOST_SEMAPHORES[host] = (sem, users - 1)
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    """os.pwrite() until every byte of *data* is on disk at *offset*."""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _preallocate(fd: int, length: int) -> None:
+    """
+    Reserve *length* bytes on disk up front to avoid extent fragmentation.
+    Blocking (glibc emulates fallocate by writing every block on filesystems
+    without native support) — run it via asyncio.to_thread().
+    """
+    if not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(fd, 0, length)
+    except OSError as exc:
+        logger.debug(f"Preallocation skipped: {exc}")
 
 
 def _extract_filename(url: str) -> str:
@@ -0,0 +1,14 @@
+"""
+Telegram Rate Limiter
+- One shared limiter for every outbound Bot API edit/send
+- Keeps concurrent trackers under Telegram's global per-bot limit
+"""
+
+from aiolimiter import AsyncLimiter
+
+from config import TELEGRAM_CALLS_PER_SECOND
+
+# Usage:
+#     async with tg_rate:
+#         await message.edit_text(...)
+tg_rate = AsyncLimiter(TELEGRAM_CALLS_PER_SECOND, 1)
@@ -1,16 +1,28 @@
 """
 Real-time Progress Tracker
 - Edits a Telegram message with a visual progress bar
-- Throttled updates to avoid Telegram rate-limits
+- Throttled updates, all edits go through the shared tg_rate limiter
+- Batch mode: many trackers share one status dict rendered by a single reporter
 """
 
 import time
+import asyncio
 import logging
+from typing import Optional
 
 from telegram import Message
 
+from utils.rate_limit import tg_rate
+
 logger = logging.getLogger(__name__)
 
+# Every possible progress bar, indexed by the number of filled cells
+_BAR_WIDTH = 20
+_BARS = [
+    "[" + "█" * filled + "░" * (_BAR_WIDTH - filled) + "]"
+    for filled in range(_BAR_WIDTH + 1)
+]
+
 
 class ProgressTracker:
     """
@@ -21,6 +33,10 @@ class ProgressTracker:
         tracker = ProgressTracker(msg, "video.mp4", update_interval=3.0)
         await tracker.update(downloaded_bytes, total_bytes)
         await tracker.complete()
+
+    When *status* is given, the tracker writes its text into
+    ``status[key]`` instead of editing the message; a ProgressReporter
+    then renders the whole dict.
     """
 
     def __init__(
@@ -28,24 +44,40 @@ class ProgressTracker:
         message: Message,
         filename: str,
         update_interval: float = 3.0,
+        status: Optional[dict[int, str]] = None,
+        key: int = 0,
     ) -> None:
         self.message = message
         self.filename = filename
         self.update_interval = update_interval
+        self._status = status
+        self._key = key
         self._last_update: float = 0.0
         self._last_text: str = ""
+        self._last_pct: int = -1
+        self._last_dl_tenths: int = -1
 
     # ── public API ──────────────────────────────────────────
 
     async def update(self, downloaded: int, total: int) -> None:
-        """Called after every chunk. Only edits message if interval elapsed."""
+        """
+        Called by the downloader (which already throttles).
+        Only edits message if interval elapsed — kept as a safety net.
+        """
         now = time.monotonic()
         if now - self._last_update < self.update_interval:
             return
+
+        # Skip formatting entirely if the displayed numbers haven't moved
+        pct = min(int(downloaded / total * 100), 100) if total > 0 else 0
+        dl_tenths = round(downloaded / 104_857.6)  # 0.1 MB units, as displayed
+        if pct == self._last_pct and dl_tenths == self._last_dl_tenths:
+            return
+        self._last_pct = pct
+        self._last_dl_tenths = dl_tenths
         self._last_update = now
 
         if total > 0:
-            pct = min(int(downloaded / total * 100), 100)
             bar = self._bar(pct)
             dl_mb = downloaded / 1_048_576
             tot_mb = total / 1_048_576
@@ -72,12 +104,73 @@ class ProgressTracker:
         if text == self._last_text:
             return
         self._last_text = text
+        if self._status is not None:
+            self._status[self._key] = text
+            return
         try:
-            await self.message.edit_text(text, parse_mode="Markdown")
+            async with tg_rate:
+                await self.message.edit_text(text, parse_mode="Markdown")
         except Exception as exc:
             logger.debug(f"Progress edit failed: {exc}")
 
     @staticmethod
-    def _bar(pct: int, width: int = 20) -> str:
-        filled = int(width * pct / 100)
-        return "[" + "█" * filled + "░" * (width - filled) + "]"
+    def _bar(pct: int) -> str:
+        return _BARS[int(_BAR_WIDTH * pct / 100)]
+
+
+class ProgressReporter:
+    """
+    Periodically renders a shared status dict (filled by batch-mode
+    ProgressTrackers) into one Telegram message, so concurrent downloads
+    cost a single edit per interval instead of one per tracker.
+
+    Usage:
+        status: dict[int, str] = {}
+        reporter = ProgressReporter(msg, "📥 Downloading 3 files…", status)
+        task = asyncio.create_task(reporter.run())
+        ...
+        task.cancel()
+        await reporter.flush()
+    """
+
+    # Telegram rejects messages longer than 4096 characters
+    MAX_TEXT_LENGTH = 4000
+
+    def __init__(
+        self,
+        message: Message,
+        header: str,
+        status: dict[int, str],
+        update_interval: float = 3.0,
+    ) -> None:
+        self.message = message
+        self.header = header
+        self.status = status
+        self.update_interval = update_interval
+        self._last_text: str = ""
+
+    async def run(self) -> None:
+        """Edit the message every interval until cancelled."""
+        while True:
+            await asyncio.sleep(self.update_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        text = self._render()
+        if text == self._last_text:
+            return
+        self._last_text = text
+        try:
+            async with tg_rate:
+                await self.message.edit_text(text, parse_mode="Markdown")
+        except Exception as exc:
+            logger.debug(f"Progress edit failed: {exc}")
+
+    def _render(self) -> str:
+        text = self.header
+        for key in sorted(self.status):
+            line = self.status[key]
+            if len(text) + len(line) + 2 > self.MAX_TEXT_LENGTH:
+                return text + "\n…"
+            text += "\n\n" + line
+        return text
@@ -8,13 +8,19 @@ File Utilities
 import re
 import shutil
 import logging
+import functools
 from pathlib import Path
 
 from config import TEMP_DIR, VIDEO_EXTENSIONS
 
 logger = logging.getLogger(__name__)
 
+# Path separators become "_", null bytes are dropped
+_SEPARATORS = str.maketrans({"/": "_", "\\": "_", "\x00": None})
+_RESERVED_CHARS = re.compile(r'[<>:"|?*]')
 
+
+@functools.lru_cache(maxsize=4096)
 def sanitize_filename(name: str) -> str:
     """
     Make a filename safe for local storage:
@@ -23,14 +29,13 @@ def sanitize_filename(name: str) -> str:
     - Replace reserved characters
     - Truncate to 200 chars
     """
-    name = name.replace("/", "_").replace("\\", "_").replace("\x00", "")
+    name = name.translate(_SEPARATORS)
     name = name.lstrip(". ")
-    name = re.sub(r'[<>:"|?*]', "_", name)
+    name = _RESERVED_CHARS.sub("_", name)
 
     if len(name) > 200:
-        stem = Path(name).stem[:180]
-        ext = Path(name).suffix
-        name = stem + ext
+        path = Path(name)
+        name = path.stem[:180] + path.suffix
 
     return name or "unnamed_file"
 
@@ -46,18 +51,20 @@ def get_temp_dir(session_id: str) -> Path:
 def cleanup_temp_dir(session_id: str) -> None:
     """Remove the entire session temp directory tree."""
     path = TEMP_DIR / session_id
-    if not path.exists():
-        return
     try:
         shutil.rmtree(path)
         logger.info(f"Cleaned temp dir: {path}")
+    except FileNotFoundError:
+        return
     except Exception as exc:
         logger.error(f"Cleanup failed for {path}: {exc}")
 
 
+@functools.lru_cache(maxsize=4096)
 def get_file_extension(name: str) -> str:
     return Path(name).suffix.lower()
 
 
+@functools.lru_cache(maxsize=4096)
 def is_video_file(name: str) -> bool:
     return get_file_extension(name) in VIDEO_EXTENSIONS
@@ -1,15 +1,35 @@
 """
 ZIP Archive Creator
 - Compresses a list of files into a single ZIP
+- Already-compressed formats are STORED, everything else uses fast DEFLATE
+- Streams each file in 1 MB blocks (ZIP64 enabled)
 - Deletes originals after they are added
+- Blocking — call it via asyncio.to_thread() from async code
 """
 
+import shutil
 import zipfile
 import logging
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Formats that are already compressed — deflating them again only burns CPU
+_INCOMPRESSIBLE = frozenset({
+    ".mp4", ".mkv", ".avi", ".mov", ".webm",
+    ".zip", ".rar", ".7z", ".gz", ".bz2", ".xz",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp",
+    ".mp3", ".flac", ".ogg", ".m4a", ".aac",
+    ".pdf", ".docx", ".xlsx", ".pptx",
+    ".apk", ".dmg",
+})
+
+# Level 1 is several times faster than the default 6 with a small size penalty
+_COMPRESS_LEVEL = 1
+
+# Copy buffer per file (ZipFile.write() uses 8 KB)
+_COPY_BUFFER_SIZE = 1 << 20
+
 
 def create_zip(files: list[Path], output_path: Path) -> Path:
     """
@@ -19,10 +39,10 @@ def create_zip(files: list[Path], output_path: Path) -> Path:
     """
     logger.info(f"Creating ZIP with {len(files)} file(s) → {output_path.name}")
 
-    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
+    with zipfile.ZipFile(output_path, "w", allowZip64=True) as zf:
         for fp in files:
             if fp.exists():
-                zf.write(fp, fp.name)
+                _add_file(zf, fp)
                 logger.debug(f"  Added: {fp.name}")
             else:
                 logger.warning(f"  Missing, skipped: {fp}")
@@ -37,3 +57,17 @@ def create_zip(files: list[Path], output_path: Path) -> Path:
     size = output_path.stat().st_size
     logger.info(f"ZIP created: {output_path.name} ({size:,} bytes)")
     return output_path
+
+
+def _add_file(zf: zipfile.ZipFile, fp: Path) -> None:
+    """Same as ZipFile.write(), but picks the method per file and copies in 1 MB blocks."""
+    zinfo = zipfile.ZipInfo.from_file(fp, fp.name)
+    if fp.suffix.lower() in _INCOMPRESSIBLE:
+        zinfo.compress_type = zipfile.ZIP_STORED
+    else:
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        # No public setter before Python 3.13; ZipFile.write() sets it the same way
+        zinfo._compresslevel = _COMPRESS_LEVEL
+
+    with open(fp, "rb") as src, zf.open(zinfo, "w") as dest:
+        shutil.copyfileobj(src, dest, _COPY_BUFFER_SIZE)